@@ -5,6 +5,9 @@ Flask-based dashboard for satellite image classification with 3 ML models.
 
 from flask import Flask, render_template, request, jsonify
 import os
+import io
+import hashlib
+import numpy as np
 from werkzeug.utils import secure_filename
 from models.predictor import LandClassifier, CLASS_NAMES, MODEL_CONFIG
 
@@ -13,22 +16,53 @@ app = Flask(__name__)
 
 # Configuration
 app.config['UPLOAD_FOLDER'] = 'uploads'
+app.config['SAVE_UPLOADS'] = os.environ.get('SAVE_UPLOADS') == '1'  # Debug: keep copies on disk
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'tif', 'tiff'}
+ALLOWED_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'tif', 'tiff'})
+
+# Validation error messages
+_BAD_EXT_MSG = f'Invalid file type. Allowed: {", ".join(sorted(ALLOWED_EXTENSIONS))}'
+_BAD_MODEL_MSG = f'Invalid model. Choose from: {", ".join(MODEL_CONFIG.keys())}'
+
+classifier = None
+
+
+def create_app(models_dir='.'):
+    """Load all models (once per process) and return the Flask app.
+    
+    Called at import time. Under gunicorn the app is not preloaded, so this
+    runs in each worker after the fork (TensorFlow is not fork-safe).
+    """
+    global classifier
+    if classifier is None:
+        print("\n🛰️  Loading Land Classification Models...")
+        classifier = LandClassifier(models_dir=models_dir)
+        print("✓ Models ready!\n")
+    return app
 
-# Ensure upload directory exists
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 # Initialize classifier (loads all models)
-print("\n🛰️  Loading Land Classification Models...")
-classifier = LandClassifier(models_dir='.')
-print("✓ Models ready!\n")
+create_app()
 
 
 def allowed_file(filename):
     """Check if file extension is allowed."""
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    _, dot, ext = filename.rpartition('.')
+    return bool(dot) and ext.lower() in ALLOWED_EXTENSIONS
+
+
+def read_upload(file, filename):
+    """Read an uploaded file into memory and return (buffer, content_hash)."""
+    data = file.read()
+    content_hash = hashlib.blake2b(data, digest_size=16).hexdigest()
+    
+    if app.config['SAVE_UPLOADS']:
+        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(filename))
+        with open(filepath, 'wb') as f:
+            f.write(data)
+    
+    return io.BytesIO(data), content_hash
 
 
 @app.route('/')
@@ -71,27 +105,21 @@ def predict():
     if not allowed_file(file.filename):
         return jsonify({
             'success': False, 
-            'error': f'Invalid file type. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'
+            'error': _BAD_EXT_MSG
         }), 400
     
     # Validate model selection
     if model_key not in MODEL_CONFIG:
         return jsonify({
             'success': False,
-            'error': f'Invalid model. Choose from: {", ".join(MODEL_CONFIG.keys())}'
+            'error': _BAD_MODEL_MSG
         }), 400
     
     try:
-        # Save file temporarily
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        image, content_hash = read_upload(file, file.filename)
         
         # Run prediction
-        result = classifier.predict(filepath, model_key)
-        
-        # Clean up uploaded file
-        os.remove(filepath)
+        result = classifier.predict(image, model_key, content_hash)
         
         return jsonify(result)
         
@@ -125,20 +153,14 @@ def compare():
     if not allowed_file(file.filename):
         return jsonify({
             'success': False, 
-            'error': f'Invalid file type. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'
+            'error': _BAD_EXT_MSG
         }), 400
     
     try:
-        # Save file temporarily
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        image, content_hash = read_upload(file, file.filename)
         
         # Run comparison on all models
-        result = classifier.compare_all(filepath)
-        
-        # Clean up uploaded file
-        os.remove(filepath)
+        result = classifier.compare_all(image, content_hash)
         
         return jsonify(result)
         
@@ -164,27 +186,21 @@ def heatmap():
     if not allowed_file(file.filename):
         return jsonify({
             'success': False, 
-            'error': f'Invalid file type. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'
+            'error': _BAD_EXT_MSG
         }), 400
     
     # Validate model selection
     if model_key not in MODEL_CONFIG:
         return jsonify({
             'success': False,
-            'error': f'Invalid model. Choose from: {", ".join(MODEL_CONFIG.keys())}'
+            'error': _BAD_MODEL_MSG
         }), 400
     
     try:
-        # Save file temporarily
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        image, content_hash = read_upload(file, file.filename)
         
         # Generate heatmap
-        result = classifier.generate_heatmap(filepath, model_key)
-        
-        # Clean up uploaded file
-        os.remove(filepath)
+        result = classifier.generate_heatmap(image, model_key, content_hash)
         
         return jsonify(result)
         
@@ -210,26 +226,29 @@ def analyze_series():
     if model_key not in MODEL_CONFIG:
         return jsonify({
             'success': False,
-            'error': f'Invalid model. Choose from: {", ".join(MODEL_CONFIG.keys())}'
+            'error': _BAD_MODEL_MSG
         }), 400
     
     try:
         results = []
-        filepaths = []
+        images = []
+        content_hashes = []
+        indices = []
         
-        # Process each image
+        # Read each valid image
         for i, file in enumerate(files):
             if file.filename == '' or not allowed_file(file.filename):
                 continue
                 
-            filename = secure_filename(f"series_{i}_{file.filename}")
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            filepaths.append(filepath)
-            
-            # Run prediction
-            result = classifier.predict(filepath, model_key)
-            
+            image, content_hash = read_upload(file, f"series_{i}_{file.filename}")
+            images.append(image)
+            content_hashes.append(content_hash)
+            indices.append(i)
+        
+        # Run all predictions in a single batch
+        batch_results = classifier.predict_batch(images, model_key, content_hashes)
+        
+        for i, result in zip(indices, batch_results):
             if result['success']:
                 date_label = dates[i] if i < len(dates) and dates[i] else f"T{i+1}"
                 results.append({
@@ -240,28 +259,23 @@ def analyze_series():
                     'probabilities': result['probabilities']
                 })
         
-        # Clean up files
-        for fp in filepaths:
-            if os.path.exists(fp):
-                os.remove(fp)
-        
         if len(results) < 2:
             return jsonify({'success': False, 'error': 'Could not process enough images'}), 400
         
-        # Detect changes
-        changes = []
-        for i in range(1, len(results)):
-            prev = results[i-1]
-            curr = results[i]
-            if prev['predicted_class'] != curr['predicted_class']:
-                changes.append({
-                    'from_date': prev['date'],
-                    'to_date': curr['date'],
-                    'from_class': prev['predicted_class'],
-                    'to_class': curr['predicted_class'],
-                    'from_confidence': prev['confidence'],
-                    'to_confidence': curr['confidence']
-                })
+        # Detect changes (indices where the class differs from the next one)
+        labels = np.fromiter(
+            (CLASS_NAMES.index(r['predicted_class']) for r in results),
+            dtype=np.int8, count=len(results)
+        )
+        changed = np.flatnonzero(labels[1:] != labels[:-1])
+        changes = [{
+            'from_date': results[i]['date'],
+            'to_date': results[i + 1]['date'],
+            'from_class': results[i]['predicted_class'],
+            'to_class': results[i + 1]['predicted_class'],
+            'from_confidence': results[i]['confidence'],
+            'to_confidence': results[i + 1]['confidence']
+        } for i in changed]
         
         # Build timeline data for chart
         timeline = {
@@ -289,6 +303,8 @@ if __name__ == '__main__':
     print("="*50)
     print("➤ Open http://127.0.0.1:5000 in your browser")
     print("="*50 + "\n")
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Development server only; production runs under gunicorn
+    # (gunicorn -c gunicorn_conf.py app:app) and never uses debug mode.
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000)
 
 
@@ -0,0 +1,78 @@
+"""
+TFLite Conversion Script
+Converts the Keras .h5 models to fully int8-quantized TFLite models for CPU serving.
+
+Usage: python convert_tflite.py <sample_images_dir> [num_samples]
+
+The sample directory should contain EuroSAT-like images; they are used as the
+representative dataset to calibrate activation ranges. The resulting .tflite
+files are written next to the .h5 models and picked up automatically by
+LandClassifier on startup.
+"""
+
+import os
+import sys
+import tempfile
+import tensorflow as tf
+from models.predictor import LandClassifier, MODEL_CONFIG
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff')
+
+
+def representative_dataset(classifier, model_key, image_paths):
+    """Yield preprocessed samples for quantization calibration."""
+    def generator():
+        for path in image_paths:
+            try:
+                yield [classifier.preprocess_image(path, model_key)]
+            except Exception as e:
+                print(f"  skipping {path}: {e}")
+    return generator
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    samples_dir = sys.argv[1]
+    num_samples = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    image_paths = sorted(
+        os.path.join(samples_dir, f) for f in os.listdir(samples_dir)
+        if f.lower().endswith(IMAGE_EXTENSIONS)
+    )[:num_samples]
+    if not image_paths:
+        print(f"✗ No sample images found in {samples_dir}")
+        sys.exit(1)
+
+    # Load the original Keras models
+    classifier = LandClassifier(models_dir='.', prefer_tflite=False)
+
+    for model_key, model in classifier.models.items():
+        config = MODEL_CONFIG[model_key]
+        print(f"Converting {config['name']}...")
+
+        # from_keras_model fails on Keras 3 models, so go through a SavedModel
+        with tempfile.TemporaryDirectory() as export_dir:
+            model.export(export_dir)
+            converter = tf.lite.TFLiteConverter.from_saved_model(export_dir)
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            converter.representative_dataset = representative_dataset(
+                classifier, model_key, image_paths
+            )
+            # Integer-only ops with int8 input/output (LandClassifier quantizes
+            # inputs and dequantizes outputs using the tensor parameters)
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+            converter.inference_input_type = tf.int8
+            converter.inference_output_type = tf.int8
+            tflite_model = converter.convert()
+
+        output_path = os.path.join(classifier.models_dir, config['tflite_path'])
+        with open(output_path, 'wb') as f:
+            f.write(tflite_model)
+        print(f"✓ Saved {output_path} ({len(tflite_model) / 1024:.0f} KB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+"""
+Gunicorn configuration for the Land Classification app.
+Usage: gunicorn -c gunicorn_conf.py app:app
+"""
+
+bind = '0.0.0.0:5000'
+
+# Threaded workers: uploads can be decoded while another request is in TF
+worker_class = 'gthread'
+workers = 2
+threads = 4
+
+# TensorFlow is not fork-safe, so each worker imports the app and loads its
+# own models after the fork instead of inheriting them from the master
+preload_app = False
+
+# Headroom for the per-worker model load (and download on a cold start)
+timeout = 300
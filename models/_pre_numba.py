@@ -0,0 +1,111 @@
+"""
+Preprocessing Kernels
+Fill a preallocated float32 model input of shape (1, H, W, C_out) from a
+uint8 image of shape (H, W, C), folding the /255 normalization into the same
+pass. JIT-compiled with Numba when available, NumPy otherwise.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True, fastmath=True)
+    def to_gray64(src, out):
+        """Average all channels into a single grayscale channel."""
+        h, w, c = src.shape
+        scale = np.float32(1.0 / (255.0 * c))
+        for i in range(h):
+            for j in range(w):
+                acc = np.float32(0.0)
+                for k in range(c):
+                    acc += src[i, j, k]
+                out[0, i, j, 0] = acc * scale
+
+    @njit(cache=True, fastmath=True)
+    def to_rgb64(src, out):
+        """Copy RGB (dropping alpha) or replicate a single channel to 3."""
+        h, w, c = src.shape
+        scale = np.float32(1.0 / 255.0)
+        for i in range(h):
+            for j in range(w):
+                if c >= 3:
+                    for k in range(3):
+                        out[0, i, j, k] = src[i, j, k] * scale
+                else:
+                    v = src[i, j, 0] * scale
+                    for k in range(3):
+                        out[0, i, j, k] = v
+
+    @njit(cache=True, fastmath=True)
+    def rgb_to_rgbnir64(src, out):
+        """Build RGB + NIR, using the grayscale mean as synthetic NIR for RGB input."""
+        h, w, c = src.shape
+        scale = np.float32(1.0 / 255.0)
+        for i in range(h):
+            for j in range(w):
+                if c >= 4:
+                    for k in range(4):
+                        out[0, i, j, k] = src[i, j, k] * scale
+                elif c == 3:
+                    r = np.float32(src[i, j, 0])
+                    g = np.float32(src[i, j, 1])
+                    b = np.float32(src[i, j, 2])
+                    out[0, i, j, 0] = r * scale
+                    out[0, i, j, 1] = g * scale
+                    out[0, i, j, 2] = b * scale
+                    out[0, i, j, 3] = (r + g + b) * (scale / np.float32(3.0))
+                else:
+                    v = src[i, j, 0] * scale
+                    for k in range(4):
+                        out[0, i, j, k] = v
+
+else:
+
+    def to_gray64(src, out):
+        """Average all channels into a single grayscale channel."""
+        np.mean(src, axis=2, dtype=np.float32, out=out[0, :, :, 0])
+        out *= np.float32(1.0 / 255.0)
+
+    def to_rgb64(src, out):
+        """Copy RGB (dropping alpha) or replicate a single channel to 3."""
+        rgb = src[:, :, :3] if src.shape[2] >= 3 else src[:, :, :1]
+        np.multiply(rgb, np.float32(1.0 / 255.0), out=out[0], casting='unsafe')
+
+    def rgb_to_rgbnir64(src, out):
+        """Build RGB + NIR, using the grayscale mean as synthetic NIR for RGB input."""
+        if src.shape[2] == 3:
+            np.multiply(src, np.float32(1.0 / 255.0), out=out[0, :, :, :3], casting='unsafe')
+            np.mean(out[0, :, :, :3], axis=2, out=out[0, :, :, 3])
+        else:
+            bands = src[:, :, :4] if src.shape[2] >= 4 else src[:, :, :1]
+            np.multiply(bands, np.float32(1.0 / 255.0), out=out[0], casting='unsafe')
+
+
+# Kernel used for each model key
+KERNELS = {
+    'rgb': to_rgb64,
+    'rgb_nir': rgb_to_rgbnir64,
+    'ndvi': to_gray64,
+}
+
+
+def warmup(size=64):
+    """Compile every kernel for the channel counts PIL produces.
+    
+    ``np.asarray`` on a PIL image returns a read-only array, which Numba
+    types separately from a writable one, so both variants are compiled.
+    """
+    for channels in (1, 3, 4):
+        for writable in (False, True):
+            src = np.zeros((size, size, channels), dtype=np.uint8)
+            src.setflags(write=writable)
+            to_gray64(src, np.empty((1, size, size, 1), dtype=np.float32))
+            to_rgb64(src, np.empty((1, size, size, 3), dtype=np.float32))
+            rgb_to_rgbnir64(src, np.empty((1, size, size, 4), dtype=np.float32))
@@ -0,0 +1,165 @@
+"""
+Tests for LandClassifier.
+Run with: python -m pytest tests
+"""
+
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from models import predictor
+from models.predictor import LandClassifier, TFLiteModel, MODEL_CONFIG, CLASS_NAMES
+
+
+class CallTracker:
+    """Counts how many model calls are in flight at once."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.active -= 1
+
+
+def _softmax_from_input(x, weights):
+    """Deterministic per-model probabilities derived from the input."""
+    logits = x.reshape(len(x), -1).mean(axis=1, keepdims=True) * weights
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return (exp / exp.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+class StubModel:
+    """Keras-like model with a fixed, model-specific output."""
+
+    def __init__(self, seed, tracker):
+        self.weights = np.random.default_rng(seed).normal(size=len(CLASS_NAMES)) * 10
+        self.tracker = tracker
+
+    def predict(self, x, verbose=0, batch_size=None):
+        with self.tracker:
+            time.sleep(0.02)
+            return _softmax_from_input(x, self.weights)
+
+
+class FakeInterpreter:
+    """Stands in for tf.lite.Interpreter and flags overlapping invokes."""
+
+    def __init__(self, model_path):
+        self.weights = np.random.default_rng(sum(model_path.encode())).normal(size=len(CLASS_NAMES)) * 10
+        self.shape = (1,) + next(
+            c['input_shape'] for c in MODEL_CONFIG.values() if c['tflite_path'] == model_path
+        )
+        self.in_flight = 0
+        self.overlapped = False
+        self._input = None
+
+    def allocate_tensors(self):
+        pass
+
+    def get_input_details(self):
+        return [{'index': 0, 'dtype': np.float32, 'quantization': (0.0, 0), 'shape': self.shape}]
+
+    def get_output_details(self):
+        return [{'index': 1, 'dtype': np.float32, 'quantization': (0.0, 0)}]
+
+    def set_tensor(self, index, value):
+        self._input = value.copy()
+
+    def invoke(self):
+        self.in_flight += 1
+        if self.in_flight > 1:
+            self.overlapped = True
+        time.sleep(0.005)
+        self._output = _softmax_from_input(self._input, self.weights)
+        self.in_flight -= 1
+
+    def get_tensor(self, index):
+        return self._output
+
+
+@pytest.fixture
+def image_bytes():
+    rng = np.random.default_rng(0)
+    buffer = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, (96, 96, 3), dtype=np.uint8)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _make_classifier(monkeypatch, build_models):
+    """Build a LandClassifier whose models come from ``build_models``."""
+    def load_models(self):
+        self.models.update(build_models())
+
+    monkeypatch.setattr(LandClassifier, 'load_models', load_models)
+    monkeypatch.setattr(LandClassifier, '_build_inference', lambda self: None)
+    return LandClassifier()
+
+
+def _compare_concurrently(classifier, image_bytes, callers=6):
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        futures = [
+            pool.submit(classifier.compare_all, io.BytesIO(image_bytes))
+            for _ in range(callers)
+        ]
+        return [f.result() for f in futures]
+
+
+def _assert_matches_serial(classifier, image_bytes, comparisons):
+    serial = {
+        key: classifier.predict(io.BytesIO(image_bytes), key)
+        for key in MODEL_CONFIG
+    }
+    for comparison in comparisons:
+        assert comparison['success']
+        assert list(comparison['models']) == list(MODEL_CONFIG)
+        for key, result in comparison['models'].items():
+            assert result['predicted_class'] == serial[key]['predicted_class']
+            assert result['probabilities'] == serial[key]['probabilities']
+
+
+def test_compare_all_concurrent_matches_serial(monkeypatch, image_bytes):
+    tracker = CallTracker()
+    classifier = _make_classifier(monkeypatch, lambda: {
+        key: StubModel(seed, tracker) for seed, key in enumerate(MODEL_CONFIG)
+    })
+
+    comparisons = _compare_concurrently(classifier, image_bytes)
+
+    _assert_matches_serial(classifier, image_bytes, comparisons)
+    # The models really ran side by side
+    assert tracker.max_active > 1
+
+
+def test_compare_all_serializes_tflite_interpreters(monkeypatch, image_bytes):
+    monkeypatch.setattr(predictor.tf.lite, 'Interpreter', FakeInterpreter, raising=False)
+    classifier = _make_classifier(monkeypatch, lambda: {
+        key: TFLiteModel(config['tflite_path']) for key, config in MODEL_CONFIG.items()
+    })
+
+    comparisons = _compare_concurrently(classifier, image_bytes)
+
+    _assert_matches_serial(classifier, image_bytes, comparisons)
+    for model in classifier.models.values():
+        assert not model.interpreter.overlapped
+
+
+def test_undecodable_upload_reports_plain_error(monkeypatch):
+    tracker = CallTracker()
+    classifier = _make_classifier(monkeypatch, lambda: {'rgb': StubModel(0, tracker)})
+
+    result = classifier.predict(io.BytesIO(b'not an image'), 'rgb', 'hash')
+
+    assert result == {'success': False, 'error': 'Could not decode image'}